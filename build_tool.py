@@ -28,6 +28,7 @@ def build():
         f"--add-data={st_path}{os.pathsep}streamlit",
         "--add-data=gantt_app.py;.",
         "--add-data=pptx_generator.py;.",
+        "--add-data=scheduler.py;.",
         "--add-data=run_gantt.bat;.",
         "--collect-all", "streamlit",
         "--collect-all", "pptx",
@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import datetime
 import pptx_generator
+import scheduler
 import sys
 import os
 import io
@@ -64,7 +65,8 @@ if 'data_loaded' not in st.session_state:
         
     st.session_state['topic'] = saved_topic
     st.session_state['base_date'] = datetime.datetime.strptime(saved_date, "%Y-%m-%d").date()
-    st.session_state['tasks'] = saved_tasks
+    st.session_state['tasks'] = scheduler.ensure_task_ids(saved_tasks)
+    st.session_state['schedule'] = None
     st.session_state['data_loaded'] = True
     
 # Init New Task fields
@@ -73,7 +75,8 @@ defaults = {
     'new_desc': '', 'new_status': '待處理',
     'new_start': datetime.date.today(), 
     'new_end': datetime.date.today() + datetime.timedelta(days=7),
-    'new_bar_text': ''
+    'new_bar_text': '',
+    'new_preds': []
 }
 for k, v in defaults.items():
     if k not in st.session_state: st.session_state[k] = v
@@ -88,8 +91,21 @@ def auto_save():
         # Web mode: No auto-save to disk, logic relies on session state
         pass
 
+def get_schedule():
+    """Dependency schedule of current tasks. Built once, then updated incrementally by the callbacks."""
+    if st.session_state.get('schedule') is None:
+        # Same cleanup as the PPTX export, so both show the same dates
+        schedule, problems = scheduler.build_schedule(st.session_state['tasks'])
+        for msg in problems:
+            st.warning(msg)
+        st.session_state['schedule'] = schedule
+    return st.session_state['schedule']
+
 def add_task_callback():
+    # Fetch before appending, otherwise a fresh build would already contain the new task
+    schedule = get_schedule()
     new_task = {
+        'id': scheduler.next_task_id(st.session_state['tasks']),
         'subject': st.session_state.new_subject,
         'user': st.session_state.new_user,
         'it_contact': st.session_state.new_it,
@@ -98,20 +114,53 @@ def add_task_callback():
         'status': st.session_state.new_status,
         'start_date': st.session_state.new_start.strftime('%Y-%m-%d'),
         'end_date': st.session_state.new_end.strftime('%Y-%m-%d'),
-        'bar_text': st.session_state.new_bar_text
+        'bar_text': st.session_state.new_bar_text,
+        'predecessors': list(st.session_state.new_preds)
     }
+    try:
+        schedule.add_task(new_task)
+    except ValueError as e:
+        st.error(f"無法新增: {e}")
+        return
     st.session_state['tasks'].append(new_task)
     auto_save() 
 
 def update_task_callback(idx, updated_task):
+    schedule = get_schedule()
+    try:
+        if updated_task['id'] in schedule:
+            schedule.update_task(
+                updated_task['id'],
+                start_date=datetime.datetime.strptime(updated_task['start_date'], '%Y-%m-%d').date(),
+                end_date=datetime.datetime.strptime(updated_task['end_date'], '%Y-%m-%d').date(),
+                predecessors=updated_task['predecessors']
+            )
+        else:
+            # Task was left out of the schedule (e.g. invalid dates in an uploaded file)
+            schedule.add_task(updated_task)
+    except ValueError as e:
+        st.error(f"無法儲存: {e}")
+        return False
     st.session_state['tasks'][idx] = updated_task
     st.session_state['edit_index'] = None
     auto_save()
+    return True
 
 def delete_task_callback(idx):
-    st.session_state['tasks'].pop(idx)
+    removed = st.session_state['tasks'].pop(idx)
+    # Drop links pointing at the deleted task
+    for t in st.session_state['tasks']:
+        if removed['id'] in t.get('predecessors', []):
+            t['predecessors'] = [p for p in t['predecessors'] if p != removed['id']]
+    schedule = get_schedule()
+    if removed['id'] in schedule:
+        schedule.remove_task(removed['id'])
+    st.session_state['new_preds'] = [p for p in st.session_state.get('new_preds', []) if p != removed['id']]
     if st.session_state['edit_index'] == idx:
         st.session_state['edit_index'] = None
+    elif st.session_state['edit_index'] is not None and st.session_state['edit_index'] > idx:
+        # Keep the open edit form on the same task after the rows shift up
+        st.session_state['edit_index'] -= 1
     auto_save()
 
 def reset_input_fields():
@@ -127,7 +176,8 @@ def handle_file_upload():
             # Handle date string conversion
             b_date = data.get('base_date', str(datetime.date.today()))
             st.session_state['base_date'] = datetime.datetime.strptime(b_date, "%Y-%m-%d").date()
-            st.session_state['tasks'] = data.get('tasks', [])
+            st.session_state['tasks'] = scheduler.ensure_task_ids(data.get('tasks', []))
+            st.session_state['schedule'] = None
             st.success("專案檔讀取成功！")
         except Exception as e:
             st.error(f"讀取失敗: {e}")
@@ -226,6 +276,9 @@ with col3:
 
 st.markdown("---")
 
+# Predecessor options: task id -> display label
+task_labels = {t['id']: f"{t['id']} {t.get('subject', '')}" for t in st.session_state['tasks']}
+
 # --- New Task Button & Form (Toggle) ---
 if 'show_add_task' not in st.session_state:
     st.session_state['show_add_task'] = False
@@ -258,6 +311,8 @@ if st.session_state['show_add_task']:
         c7.date_input("開始日期", key="new_start")
         c8.date_input("結束日期", key="new_end")
         c9.text_input("進度條文字", key="new_bar_text", placeholder="例如: 2/5 啟動")
+        st.multiselect("前置任務", options=list(task_labels), format_func=task_labels.get, key="new_preds",
+                       help="前置任務全部完成後的下一個工作天才開始（不早於開始日期）")
         
         bn1, bn2 = st.columns([1, 5])
         if bn1.button("確認新增", type="primary", on_click=add_task_callback):
@@ -277,6 +332,10 @@ if st.session_state['tasks']:
     h_cols[3].write("狀態")
     h_cols[4].write("操作")
     
+    schedule = get_schedule()
+    show_critical = schedule.has_dependencies
+    critical = set(schedule.critical_path()) if show_critical else set()
+    
     for i, task in enumerate(st.session_state['tasks']):
         st.markdown("<hr style='margin: 5px 0; border-top: 1px solid #eee;'>", unsafe_allow_html=True)
         
@@ -285,34 +344,42 @@ if st.session_state['tasks']:
             with st.container(border=True):
                 st.caption(f"編輯中: 任務 #{i+1}")
                 r1_c1, r1_c2, r1_c3 = st.columns([2, 1, 1])
-                e_subj = r1_c1.text_input("主旨", value=task.get('subject', ''), key=f"e_sub_{i}")
-                e_user = r1_c2.text_input("用戶", value=task['user'], key=f"e_u_{i}")
-                e_it = r1_c3.text_input("IT", value=task['it_contact'], key=f"e_it_{i}")
+                e_subj = r1_c1.text_input("主旨", value=task.get('subject', ''), key=f"e_sub_{task['id']}")
+                e_user = r1_c2.text_input("用戶", value=task['user'], key=f"e_u_{task['id']}")
+                e_it = r1_c3.text_input("IT", value=task['it_contact'], key=f"e_it_{task['id']}")
                 
                 r2_c1, r2_c2, r2_c3 = st.columns([1, 2, 1])
-                e_req = r2_c1.text_input("單號", value=task['req_id'], key=f"e_req_{i}")
-                e_desc = r2_c2.text_area("Task描述", value="\n".join(task['task_desc']) if isinstance(task['task_desc'], list) else task['task_desc'], key=f"e_desc_{i}")
-                e_stats = r2_c3.selectbox("狀態", ["待處理", "開發中", "已完成"], index=["待處理", "開發中", "已完成"].index(task.get('status', '待處理')) if task.get('status') in ["待處理", "開發中", "已完成"] else 0, key=f"e_st_{i}")
+                e_req = r2_c1.text_input("單號", value=task['req_id'], key=f"e_req_{task['id']}")
+                e_desc = r2_c2.text_area("Task描述", value="\n".join(task['task_desc']) if isinstance(task['task_desc'], list) else task['task_desc'], key=f"e_desc_{task['id']}")
+                e_stats = r2_c3.selectbox("狀態", ["待處理", "開發中", "已完成"], index=["待處理", "開發中", "已完成"].index(task.get('status', '待處理')) if task.get('status') in ["待處理", "開發中", "已完成"] else 0, key=f"e_st_{task['id']}")
                 
                 r3_c1, r3_c2, r3_c3 = st.columns([1, 1, 1])
                 sd = datetime.datetime.strptime(task['start_date'], '%Y-%m-%d').date()
                 ed = datetime.datetime.strptime(task['end_date'], '%Y-%m-%d').date()
-                e_start = r3_c1.date_input("開始", value=sd, key=f"e_sd_{i}")
-                e_end = r3_c2.date_input("結束", value=ed, key=f"e_ed_{i}")
-                e_bar = r3_c3.text_input("Bar文字", value=task['bar_text'], key=f"e_bt_{i}")
+                e_start = r3_c1.date_input("開始", value=sd, key=f"e_sd_{task['id']}")
+                e_end = r3_c2.date_input("結束", value=ed, key=f"e_ed_{task['id']}")
+                e_bar = r3_c3.text_input("Bar文字", value=task['bar_text'], key=f"e_bt_{task['id']}")
+                e_preds = st.multiselect(
+                    "前置任務",
+                    options=[t_id for t_id in task_labels if t_id != task['id']],
+                    default=[p for p in task.get('predecessors', []) if p in task_labels],
+                    format_func=task_labels.get, key=f"e_pr_{task['id']}"
+                )
 
                 b1, b2 = st.columns([1, 1])
-                if b1.button("儲存", key=f"save_{i}"):
+                if b1.button("儲存", key=f"save_{task['id']}"):
                     updated = {
+                        'id': task['id'],
                         'subject': e_subj, 'user': e_user, 'it_contact': e_it, 'req_id': e_req,
                         'task_desc': e_desc.split('\n') if e_desc else [], 'status': e_stats,
                         'start_date': e_start.strftime('%Y-%m-%d'),
                         'end_date': e_end.strftime('%Y-%m-%d'),
-                        'bar_text': e_bar
+                        'bar_text': e_bar,
+                        'predecessors': e_preds
                     }
-                    update_task_callback(i, updated)
-                    st.rerun()
-                if b2.button("取消", key=f"cancel_{i}"):
+                    if update_task_callback(i, updated):
+                        st.rerun()
+                if b2.button("取消", key=f"cancel_{task['id']}"):
                     st.session_state['edit_index'] = None
                     st.rerun()
 
@@ -320,17 +387,24 @@ if st.session_state['tasks']:
             # --- View Mode (Compact) ---
             cols = st.columns([2, 1, 2, 1, 1])
             cols[0].write(f"**{task.get('subject','')}**")
+            cols[0].caption(f"{task['id']} 🔴 關鍵路徑" if task['id'] in critical else task['id'])
             cols[1].write(f"{task['user']}\n({task['it_contact']})")
-            cols[2].write(f"{task['start_date']} ~ {task['end_date']}")
+            if task.get('predecessors') and task['id'] in schedule:
+                # Linked task: show propagated dates, planned dates for reference
+                c_start, c_end = schedule.dates(task['id'])
+                cols[2].write(f"{c_start} ~ {c_end}")
+                cols[2].caption(f"前置: {', '.join(task['predecessors'])} (原訂 {task['start_date']} ~ {task['end_date']})")
+            else:
+                cols[2].write(f"{task['start_date']} ~ {task['end_date']}")
             if task.get('bar_text'): cols[2].caption(f"Bar: {task.get('bar_text')}")
             cols[3].write(f"{task['status']}")
             
             btn_c1, btn_c2 = cols[4].columns(2)
-            if btn_c1.button("✏️", key=f"edit_{i}"):
+            if btn_c1.button("✏️", key=f"edit_{task['id']}"):
                 st.session_state['edit_index'] = i
                 st.session_state['show_add_task'] = False 
                 st.rerun()
-            if btn_c2.button("🗑️", key=f"del_{i}"):
+            if btn_c2.button("🗑️", key=f"del_{task['id']}"):
                 delete_task_callback(i)
                 st.rerun()
 
@@ -5,6 +5,7 @@ from pptx.enum.shapes import MSO_SHAPE
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 import datetime
+import scheduler
 
 # --- Constants & Configuration ---
 SLIDE_WIDTH = Inches(13.333) # Widescreen 16:9
@@ -100,10 +101,13 @@ def create_pptx(data, today_date=None):
     
     date_headers = generate_date_headers(base_date)
     
+    # Propagate dates along predecessor links (tasks without links keep their dates)
+    tasks = scheduler.schedule_tasks(data.get('tasks', []))
+    
     # --- 3. Draw Table ---
     # Rows: Task rows + 1 Header
     # Cols: 6 Info + 25 Dates
-    rows_count = len(data.get('tasks', [])) + 1
+    rows_count = len(tasks) + 1
     cols_count = len(COL_WIDTHS)
     
     total_width = sum(COL_WIDTHS)
@@ -152,7 +156,7 @@ def create_pptx(data, today_date=None):
     start_monday = first_col_week_date - datetime.timedelta(days=first_col_week_date.weekday())
 
     # Fill Data Rows
-    for r_idx, task in enumerate(data.get('tasks', [])):
+    for r_idx, task in enumerate(tasks):
         r = r_idx + 1
         
         # Text Fields
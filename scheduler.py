@@ -0,0 +1,348 @@
+import datetime
+from collections import deque
+
+# --- Dependency Scheduling Engine ---
+# Tasks may list the ids of their predecessors in 'predecessors'. A linked task starts on
+# the first workday after all of its predecessors have finished, but never before its own
+# planned 'start_date' (planned dates act as "start no earlier than"). Its planned length
+# in workdays is preserved. Tasks without predecessors keep their dates as entered.
+#
+# All arithmetic is done on workday indices (Mon-Fri only), matching the PPTX grid.
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def to_workday(date_obj, forward=True):
+    """
+    Maps a date to a workday index. Weekends snap to the next Monday (forward=True)
+    or to the previous Friday (forward=False).
+    """
+    # date.fromordinal(1) (0001-01-01) is a Monday
+    week, weekday = divmod(date_obj.toordinal() - 1, 7)
+    if weekday >= 5:
+        return (week + 1) * 5 if forward else week * 5 + 4
+    return week * 5 + weekday
+
+
+def from_workday(index):
+    """Inverse of to_workday()"""
+    week, weekday = divmod(index, 5)
+    return datetime.date.fromordinal(week * 7 + weekday + 1)
+
+
+def _parse_date(date_str):
+    # Missing dates raise ValueError like malformed ones
+    return datetime.datetime.strptime(date_str or '', DATE_FORMAT).date()
+
+
+def ensure_task_ids(tasks):
+    """
+    Assigns 'T<n>' ids (in place) to tasks that do not have one yet, or whose id repeats
+    an earlier task's. Returns tasks.
+    """
+    used = {t['id'] for t in tasks if t.get('id')}
+    seen = set()
+    next_num = 1
+    for t in tasks:
+        if t.get('id') and t['id'] not in seen:
+            seen.add(t['id'])
+            continue
+        while f"T{next_num}" in used:
+            next_num += 1
+        t['id'] = f"T{next_num}"
+        used.add(t['id'])
+        seen.add(t['id'])
+    return tasks
+
+
+def next_task_id(tasks):
+    """Returns an unused 'T<n>' id for a task about to be added."""
+    used = {t.get('id') for t in tasks}
+    num = len(tasks) + 1
+    while f"T{num}" in used:
+        num += 1
+    return f"T{num}"
+
+
+class Schedule:
+    """
+    Dependency graph with forward (early dates) and backward (slack) passes.
+
+    Changes go through add_task / update_task / remove_task, which only recompute the
+    affected subgraph: early dates for the changed task and its descendants, slack
+    data for the changed task and its ancestors.
+    """
+
+    def __init__(self, tasks=()):
+        self._start = {}     # planned start (workday index)
+        self._duration = {}  # planned length in workdays
+        self._preds = {}     # id -> list of predecessor ids
+        self._succs = {}     # id -> set of successor ids
+        self._es = {}        # early start (workday index)
+        self._ef = {}        # early finish (workday index, inclusive)
+        self._tail = {}      # workdays of the longest downstream chain after this task
+        self._finish = None  # cached project finish, cleared whenever early dates change
+
+        for task in tasks:
+            task_id = task['id']
+            if task_id in self._start:
+                raise ValueError(f"任務編號重複: {task_id}")
+            self._set_dates(task_id, _parse_date(task.get('start_date')), _parse_date(task.get('end_date')))
+            self._preds[task_id] = list(task.get('predecessors') or [])
+            self._succs[task_id] = set()
+
+        for task_id, preds in self._preds.items():
+            self._check_preds(task_id, preds)
+            for p in preds:
+                self._succs[p].add(task_id)
+
+        order = self._topo_order(self._start, forward=True)
+        for task_id in order:
+            self._forward(task_id)
+        for task_id in reversed(order):
+            self._backward(task_id)
+
+    # --- Queries ---
+    def __contains__(self, task_id):
+        return task_id in self._start
+
+    @property
+    def has_dependencies(self):
+        return any(self._preds.values())
+
+    def predecessors(self, task_id):
+        return list(self._preds[task_id])
+
+    def dates(self, task_id):
+        """Returns the computed (start, end) dates of a task"""
+        return from_workday(self._es[task_id]), from_workday(self._ef[task_id])
+
+    def project_finish(self):
+        if self._finish is None:
+            self._finish = max(self._ef.values(), default=None)
+        return self._finish
+
+    def slack(self, task_id):
+        """Total float in workdays: how far the task can slip without delaying the project"""
+        return self.project_finish() - self._tail[task_id] - self._ef[task_id]
+
+    def is_critical(self, task_id):
+        return self.slack(task_id) == 0
+
+    def critical_path(self):
+        """Ids of zero-slack tasks, ordered by computed start date"""
+        finish = self.project_finish()
+        critical = [t for t in self._start if finish - self._tail[t] - self._ef[t] == 0]
+        return sorted(critical, key=lambda t: self._es[t])
+
+    def apply(self, tasks):
+        """
+        Returns copies of tasks with computed dates. Tasks without predecessors (or not
+        part of this schedule) are returned with their dates untouched.
+        """
+        result = []
+        for task in tasks:
+            task = dict(task)
+            task_id = task.get('id')
+            if task_id in self._start and self._preds[task_id]:
+                start, end = self.dates(task_id)
+                task['start_date'] = start.strftime(DATE_FORMAT)
+                task['end_date'] = end.strftime(DATE_FORMAT)
+            result.append(task)
+        return result
+
+    # --- Incremental Updates ---
+    def add_task(self, task):
+        task_id = task['id']
+        if task_id in self._start:
+            raise ValueError(f"任務編號重複: {task_id}")
+        preds = list(task.get('predecessors') or [])
+        self._check_preds(task_id, preds)
+        start, end = _parse_date(task.get('start_date')), _parse_date(task.get('end_date'))
+
+        self._set_dates(task_id, start, end)
+        self._preds[task_id] = preds
+        self._succs[task_id] = set()
+        for p in preds:
+            self._succs[p].add(task_id)
+        # A new task has no successors, so only its own dates and its ancestors' slack change
+        self._forward(task_id)
+        self._recompute_backward([task_id])
+
+    def update_task(self, task_id, start_date=None, end_date=None, predecessors=None):
+        """
+        Changes a task's planned dates and/or predecessors, then recomputes its
+        descendants (dates) and ancestors (slack). Raises ValueError on cycles.
+        """
+        old_preds = self._preds[task_id]
+        if predecessors is not None:
+            predecessors = list(predecessors)
+            self._check_preds(task_id, predecessors)
+            descendants = self._reachable([task_id], forward=True)
+            for p in predecessors:
+                if p in descendants:
+                    raise ValueError(f"前置任務 {p} 會造成循環相依 ({task_id})")
+
+        if start_date is not None or end_date is not None:
+            start = start_date if start_date is not None else from_workday(self._start[task_id])
+            end = end_date if end_date is not None else from_workday(self._start[task_id] + self._duration[task_id] - 1)
+            self._set_dates(task_id, start, end)
+
+        if predecessors is not None:
+            for p in old_preds:
+                self._succs[p].discard(task_id)
+            for p in predecessors:
+                self._succs[p].add(task_id)
+            self._preds[task_id] = predecessors
+
+        self._recompute_forward([task_id])
+        self._recompute_backward([task_id] + old_preds)
+
+    def remove_task(self, task_id):
+        """Removes a task; links from its successors to it are dropped."""
+        preds = self._preds.pop(task_id)
+        succs = self._succs.pop(task_id)
+        for p in preds:
+            self._succs[p].discard(task_id)
+        for s in succs:
+            self._preds[s] = [p for p in self._preds[s] if p != task_id]
+        for table in (self._start, self._duration, self._es, self._ef, self._tail):
+            del table[task_id]
+        self._finish = None
+
+        self._recompute_forward(succs)
+        self._recompute_backward(preds)
+
+    # --- Internals ---
+    def _set_dates(self, task_id, start, end):
+        s_idx = to_workday(start, forward=True)
+        e_idx = to_workday(end, forward=False)
+        self._start[task_id] = s_idx
+        self._duration[task_id] = max(e_idx - s_idx + 1, 1)
+
+    def _check_preds(self, task_id, preds):
+        for p in preds:
+            if p == task_id:
+                raise ValueError(f"任務不能以自己為前置任務: {task_id}")
+            if p not in self._start:
+                raise ValueError(f"找不到前置任務: {p} ({task_id})")
+
+    def _forward(self, task_id):
+        es = self._start[task_id]
+        for p in self._preds[task_id]:
+            es = max(es, self._ef[p] + 1)
+        self._es[task_id] = es
+        self._ef[task_id] = es + self._duration[task_id] - 1
+        self._finish = None
+
+    def _backward(self, task_id):
+        self._tail[task_id] = max(
+            (self._tail[s] + self._duration[s] for s in self._succs[task_id]), default=0)
+
+    def _recompute_forward(self, roots):
+        for task_id in self._topo_order(self._reachable(roots, forward=True), forward=True):
+            self._forward(task_id)
+
+    def _recompute_backward(self, roots):
+        for task_id in self._topo_order(self._reachable(roots, forward=False), forward=False):
+            self._backward(task_id)
+
+    def _reachable(self, roots, forward):
+        """Roots plus every task reachable from them (descendants or ancestors), in BFS order"""
+        edges = self._succs if forward else self._preds
+        seen = dict.fromkeys(r for r in roots if r in self._start)
+        queue = deque(seen)
+        while queue:
+            for nxt in edges[queue.popleft()]:
+                if nxt not in seen:
+                    seen[nxt] = None
+                    queue.append(nxt)
+        return seen
+
+    def _topo_order(self, nodes, forward):
+        """Kahn's algorithm restricted to nodes; forward=False yields reverse topological order"""
+        out_edges = self._succs if forward else self._preds
+        in_edges = self._preds if forward else self._succs
+        in_degree = {n: sum(1 for m in in_edges[n] if m in nodes) for n in nodes}
+        queue = deque(n for n in nodes if in_degree[n] == 0)
+        order = []
+        while queue:
+            n = queue.popleft()
+            order.append(n)
+            for m in out_edges[n]:
+                if m in in_degree:
+                    in_degree[m] -= 1
+                    if in_degree[m] == 0:
+                        queue.append(m)
+        if len(order) != len(nodes):
+            cycle = [n for n in nodes if in_degree[n] > 0]
+            raise ValueError(f"前置任務出現循環相依: {', '.join(cycle)}")
+        return order
+
+
+def build_schedule(tasks):
+    """
+    Builds a Schedule from task dicts that already have ids, cleaning up bad input
+    instead of raising. Returns (schedule, problems): tasks with a duplicate id or
+    missing/invalid dates are left out, and links to unknown tasks, to the task itself,
+    or closing a cycle are ignored. problems describes each of these.
+    """
+    problems = []
+    nodes = {}
+    for t in tasks:
+        task_id = t.get('id')
+        if task_id in nodes:
+            problems.append(f"任務編號重複，已略過: {task_id}")
+            continue
+        try:
+            _parse_date(t.get('start_date'))
+            _parse_date(t.get('end_date'))
+        except (TypeError, ValueError):
+            problems.append(f"任務日期無效，不列入排程: {task_id}")
+            continue
+        nodes[task_id] = dict(t)
+
+    for task_id, t in nodes.items():
+        preds = []
+        for p in t.get('predecessors') or []:
+            if p == task_id or p not in nodes:
+                problems.append(f"找不到前置任務，已忽略: {p} ({task_id})")
+            elif p not in preds:
+                preds.append(p)
+        t['predecessors'] = preds
+
+    # Depth-first walk along predecessor links; a link back to a task still on the
+    # stack closes a cycle and is dropped. Iterative to cope with long chains.
+    state = {}  # task id -> 1 while on the stack, 2 when done
+    for root in nodes:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(list(nodes[root]['predecessors'])))]
+        while stack:
+            task_id, preds = stack[-1]
+            for p in preds:
+                if state.get(p) == 1:
+                    nodes[task_id]['predecessors'].remove(p)
+                    problems.append(f"前置任務 {p} 造成循環相依，已忽略 ({task_id})")
+                elif p not in state:
+                    state[p] = 1
+                    stack.append((p, iter(list(nodes[p]['predecessors']))))
+                    break
+            else:
+                state[task_id] = 2
+                stack.pop()
+
+    return Schedule(nodes.values()), problems
+
+
+def schedule_tasks(tasks):
+    """
+    Returns copies of tasks with dates propagated along their predecessor links.
+    Accepts raw task dicts: missing or repeated ids are filled in, missing 'predecessors'
+    means no links. Bad input never raises; it is cleaned up as in build_schedule()
+    and otherwise passed through with its dates untouched.
+    """
+    tasks = ensure_task_ids([dict(t) for t in tasks])
+    schedule, _ = build_schedule(tasks)
+    return schedule.apply(tasks)
@@ -0,0 +1,248 @@
+import datetime
+import random
+
+import pytest
+
+import scheduler
+from scheduler import Schedule, build_schedule, schedule_tasks
+
+
+def d(s):
+    return datetime.datetime.strptime(s, '%Y-%m-%d').date()
+
+
+def diamond():
+    # A -> (B, C) -> D, B is the longer branch
+    return [
+        {'id': 'A', 'start_date': '2026-02-02', 'end_date': '2026-02-06'},
+        {'id': 'B', 'start_date': '2026-02-02', 'end_date': '2026-02-03', 'predecessors': ['A']},
+        {'id': 'C', 'start_date': '2026-02-02', 'end_date': '2026-02-02', 'predecessors': ['A']},
+        {'id': 'D', 'start_date': '2026-02-02', 'end_date': '2026-02-02', 'predecessors': ['B', 'C']},
+    ]
+
+
+def assert_matches_full_rebuild(schedule, tasks):
+    full = Schedule(tasks)
+    for t in tasks:
+        assert schedule.dates(t['id']) == full.dates(t['id'])
+        assert schedule.slack(t['id']) == full.slack(t['id'])
+    assert schedule.critical_path() == full.critical_path()
+
+
+def test_workday_round_trip_and_weekend_snap():
+    friday, saturday, monday = d('2026-02-06'), d('2026-02-07'), d('2026-02-09')
+    assert scheduler.from_workday(scheduler.to_workday(friday)) == friday
+    assert scheduler.from_workday(scheduler.to_workday(saturday)) == monday
+    assert scheduler.from_workday(scheduler.to_workday(saturday, forward=False)) == friday
+
+
+def test_dates_propagate_in_topological_order():
+    s = Schedule(diamond())
+    assert s.dates('A') == (d('2026-02-02'), d('2026-02-06'))
+    # Successors start the workday after A finishes (Friday -> Monday), keeping their length
+    assert s.dates('B') == (d('2026-02-09'), d('2026-02-10'))
+    assert s.dates('C') == (d('2026-02-09'), d('2026-02-09'))
+    assert s.dates('D') == (d('2026-02-11'), d('2026-02-11'))
+
+
+def test_planned_start_is_not_moved_earlier():
+    tasks = diamond()
+    tasks[2]['start_date'] = tasks[2]['end_date'] = '2026-02-20'
+    assert Schedule(tasks).dates('C') == (d('2026-02-20'), d('2026-02-20'))
+
+
+def test_critical_path_and_slack():
+    s = Schedule(diamond())
+    assert s.critical_path() == ['A', 'B', 'D']
+    assert [s.slack(t) for t in 'ABCD'] == [0, 0, 1, 0]
+    assert s.is_critical('B') and not s.is_critical('C')
+    assert s.has_dependencies
+
+
+@pytest.mark.parametrize('preds', [['D'], ['A']])
+def test_update_rejects_cycles_without_changing_schedule(preds):
+    s = Schedule(diamond())
+    before = {t: s.dates(t) for t in 'ABCD'}
+    with pytest.raises(ValueError):
+        s.update_task('A', start_date=d('2026-03-02'), predecessors=preds)
+    assert {t: s.dates(t) for t in 'ABCD'} == before
+
+
+def test_constructor_rejects_cycles_and_unknown_predecessors():
+    tasks = diamond()
+    tasks[0]['predecessors'] = ['D']
+    with pytest.raises(ValueError):
+        Schedule(tasks)
+    with pytest.raises(ValueError):
+        Schedule([{'id': 'A', 'start_date': '2026-02-02', 'end_date': '2026-02-02', 'predecessors': ['X']}])
+
+
+def test_update_slip_moves_downstream_only():
+    s = Schedule(diamond() + [{'id': 'E', 'start_date': '2026-02-02', 'end_date': '2026-02-04'}])
+    s.update_task('B', end_date=d('2026-02-05'))
+    assert s.dates('B') == (d('2026-02-09'), d('2026-02-12'))
+    assert s.dates('D') == (d('2026-02-13'), d('2026-02-13'))
+    assert s.dates('E') == (d('2026-02-02'), d('2026-02-04'))
+
+
+def test_update_only_recomputes_affected_subgraph(monkeypatch):
+    tasks = diamond() + [
+        {'id': 'X', 'start_date': '2026-02-02', 'end_date': '2026-02-04'},
+        {'id': 'Y', 'start_date': '2026-02-02', 'end_date': '2026-02-04', 'predecessors': ['X']},
+    ]
+    s = Schedule(tasks)
+    forward, backward = [], []
+    orig_forward, orig_backward = s._forward, s._backward
+    monkeypatch.setattr(s, '_forward', lambda t: (forward.append(t), orig_forward(t)))
+    monkeypatch.setattr(s, '_backward', lambda t: (backward.append(t), orig_backward(t)))
+
+    s.update_task('B', end_date=d('2026-02-05'))
+    assert sorted(forward) == ['B', 'D']
+    assert sorted(backward) == ['A', 'B']
+
+
+def test_remove_task_drops_successor_links():
+    s = Schedule(diamond())
+    s.remove_task('A')
+    assert 'A' not in s
+    assert s.predecessors('B') == [] and s.predecessors('C') == []
+    # B and C fall back to their planned dates once A is gone
+    assert s.dates('B') == (d('2026-02-02'), d('2026-02-03'))
+    assert s.dates('D') == (d('2026-02-04'), d('2026-02-04'))
+
+
+def test_incremental_updates_match_full_recompute():
+    rng = random.Random(7)
+    base = d('2026-01-05')
+
+    def random_dates():
+        start = base + datetime.timedelta(days=rng.randint(0, 120))
+        return start, start + datetime.timedelta(days=rng.randint(0, 10))
+
+    tasks = []
+    for i in range(300):
+        start, end = random_dates()
+        window = [f'T{j}' for j in range(max(0, i - 20), i)]
+        tasks.append({'id': f'T{i}', 'start_date': str(start), 'end_date': str(end),
+                      'predecessors': rng.sample(window, min(len(window), 2))})
+    s = Schedule(tasks)
+
+    for k in range(100):
+        i = rng.randrange(len(tasks))
+        task = tasks[i]
+        start, end = random_dates()
+        preds = None
+        if k % 3 == 0:
+            window = [t['id'] for t in tasks[max(0, i - 20):i]]
+            preds = rng.sample(window, min(len(window), 2))
+            task['predecessors'] = preds
+        s.update_task(task['id'], start_date=start, end_date=end, predecessors=preds)
+        task['start_date'], task['end_date'] = str(start), str(end)
+
+    for _ in range(10):
+        removed = tasks.pop(rng.randrange(len(tasks)))['id']
+        s.remove_task(removed)
+        for t in tasks:
+            t['predecessors'] = [p for p in t['predecessors'] if p != removed]
+
+    start, end = random_dates()
+    new_task = {'id': 'NEW', 'start_date': str(start), 'end_date': str(end), 'predecessors': [tasks[0]['id']]}
+    tasks.append(new_task)
+    s.add_task(new_task)
+
+    assert_matches_full_rebuild(s, tasks)
+
+
+def test_schedule_tasks_accepts_raw_tasks():
+    raw = [
+        {'subject': 'no id, no links', 'start_date': '2026-02-02', 'end_date': '2026-02-06'},
+        {'id': 'B', 'start_date': '2026-02-02', 'end_date': '2026-02-03', 'predecessors': ['T1']},
+        {'id': 'C', 'start_date': '', 'end_date': None, 'predecessors': ['B']},
+        {'id': 'D', 'start_date': '2026-02-02', 'end_date': '2026-02-02', 'predecessors': ['C', 'missing']},
+        {'id': 'E', 'start_date': '2026-02-07', 'end_date': '2026-02-08'},
+    ]
+    result = schedule_tasks(raw)
+    assert result[0]['id'] == 'T1'
+    # Unlinked tasks keep their dates exactly, even on weekends
+    assert (result[4]['start_date'], result[4]['end_date']) == ('2026-02-07', '2026-02-08')
+    assert (result[1]['start_date'], result[1]['end_date']) == ('2026-02-09', '2026-02-10')
+    # Undated tasks pass through; links to them or to unknown ids are ignored
+    assert result[2]['start_date'] == ''
+    assert result[3]['start_date'] == '2026-02-02'
+    # Input is not mutated
+    assert 'id' not in raw[0]
+
+
+def test_ensure_and_next_task_ids():
+    tasks = [{'id': 'T2'}, {}, {}]
+    scheduler.ensure_task_ids(tasks)
+    assert [t['id'] for t in tasks] == ['T2', 'T1', 'T3']
+    assert scheduler.next_task_id(tasks) == 'T4'
+
+
+def test_ensure_task_ids_renames_duplicates():
+    tasks = [{'id': 'A'}, {'id': 'A'}, {'id': 'T1'}]
+    scheduler.ensure_task_ids(tasks)
+    assert [t['id'] for t in tasks] == ['A', 'T2', 'T1']
+
+
+def test_first_task_added_to_schedule_built_before_append():
+    # gantt_app builds the session schedule before appending the new task
+    tasks = []
+    schedule, problems = build_schedule(tasks)
+    assert problems == [] and schedule.project_finish() is None
+    first = {'id': scheduler.next_task_id(tasks), 'start_date': '2026-02-02', 'end_date': '2026-02-04'}
+    schedule.add_task(first)
+    tasks.append(first)
+    assert schedule.dates('T1') == (d('2026-02-02'), d('2026-02-04'))
+    assert schedule.critical_path() == ['T1']
+    # Building after the append already contains it
+    with pytest.raises(ValueError):
+        build_schedule(tasks)[0].add_task(first)
+
+
+def test_build_schedule_cleans_up_and_reports():
+    tasks = diamond() + [
+        {'id': 'A', 'start_date': '2026-03-02', 'end_date': '2026-03-02'},
+        {'id': 'U', 'start_date': '', 'end_date': '2026-02-02'},
+        {'id': 'V', 'start_date': '2026-02-02', 'end_date': '2026-02-02', 'predecessors': ['U', 'V', 'missing']},
+    ]
+    tasks[0]['predecessors'] = ['D']  # closes A -> B -> D -> A and A -> C -> D -> A
+    schedule, problems = build_schedule(tasks)
+    assert 'U' not in schedule
+    assert schedule.predecessors('V') == []
+    # The walk starts at A, so the links back into A close the cycles and are dropped
+    assert schedule.predecessors('A') == ['D']
+    assert schedule.predecessors('B') == [] and schedule.predecessors('C') == []
+    assert schedule.dates('A') == (d('2026-02-05'), d('2026-02-11'))
+    # duplicate A, invalid U, three bad links on V, two cycle links
+    assert len(problems) == 7
+
+
+def test_build_schedule_handles_long_cyclic_chain():
+    n = 5000
+    tasks = [{'id': f'T{i}', 'start_date': '2026-02-02', 'end_date': '2026-02-02',
+              'predecessors': [f'T{(i - 1) % n}']} for i in range(n)]
+    schedule, problems = build_schedule(tasks)
+    assert len(problems) == 1
+    assert len(schedule.critical_path()) == n
+
+
+def test_schedule_tasks_does_not_raise_on_cycles_or_duplicates():
+    tasks = diamond()
+    tasks[0]['predecessors'] = ['D']
+    tasks.append({'id': 'B', 'start_date': '2026-02-02', 'end_date': '2026-02-02'})
+    result = schedule_tasks(tasks)
+    assert len(result) == 5
+    assert result[4]['id'] != 'B'
+    assert (result[4]['start_date'], result[4]['end_date']) == ('2026-02-02', '2026-02-02')
+
+
+def test_project_finish_cache_follows_updates():
+    s = Schedule(diamond())
+    assert s.project_finish() == scheduler.to_workday(d('2026-02-11'))
+    s.update_task('A', end_date=d('2026-02-02'))
+    assert s.project_finish() == scheduler.to_workday(d('2026-02-05'))
+    s.remove_task('D')
+    assert s.project_finish() == scheduler.to_workday(d('2026-02-04'))
+    assert s.critical_path() == ['A', 'B']